@@ -36,6 +36,12 @@ from ...services.email_service import (
 )
 from ...services.ai_writer import generate_draft_from_prompt, generate_reply_suggestion
 
+try:
+    # SIMD accelerated base64 when installed, same API as the stdlib module
+    import pybase64 as _base64  # type: ignore
+except ImportError:
+    _base64 = base64
+
 # Setup logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -96,17 +102,23 @@ async def get_folders(request: Request, body: Optional[ListRequest] = None):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error while listing folders.")
 
 
+def _decode_attachments(attachments) -> list[tuple[str, Optional[str], bytes]]:
+    """Decode base64 request attachments into (filename, content_type, bytes) tuples."""
+    attachments_data = []
+    for a in attachments:
+        try:
+            content = _base64.b64decode(a.content_base64)
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid base64 for attachment {a.filename}")
+        attachments_data.append((a.filename, a.content_type, content))
+    return attachments_data
+
+
 @router.post("/compose", response_model=DraftResponse)
 async def compose_email(request: Request, body: EmailComposeRequest):
     user = await _user_from_request(request, body.creds)
     try:
-        attachments_data = []
-        for a in body.attachments:
-            try:
-                content = base64.b64decode(a.content_base64)
-            except Exception:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid base64 for attachment {a.filename}")
-            attachments_data.append((a.filename, a.content_type, content))
+        attachments_data = _decode_attachments(body.attachments)
 
         success = await append_draft_imap(
             user=user,
@@ -134,13 +146,7 @@ async def compose_email(request: Request, body: EmailComposeRequest):
 async def send_mail(request: Request, body: SendEmailRequest):
     user = await _user_from_request(request, body.creds)
     try:
-        attachments_data = []
-        for a in body.attachments:
-            try:
-                content = base64.b64decode(a.content_base64)
-            except Exception:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid base64 for attachment {a.filename}")
-            attachments_data.append((a.filename, a.content_type, content))
+        attachments_data = _decode_attachments(body.attachments)
 
         sent = await send_email(
             user=user,
@@ -185,7 +191,9 @@ def _list_handler(folder_key: str):
             payload = await list_mailbox(user, folder=folder_key, page=page, size=size, 
                                        search_text=search_text, is_starred=is_starred, read_status=read_status)
             items = [EmailItem(**item) for item in payload.get("items", [])]
-            return PaginatedEmails(page=page, size=size, total=payload.get("total", 0), items=items)
+            result = PaginatedEmails(page=page, size=size, total=payload.get("total", 0), items=items)
+            # Serialize with pydantic-core directly; skips FastAPI re-validating and re-encoding the page
+            return Response(content=result.model_dump_json(), media_type="application/json")
         except ValueError as e:
             logger.warning(f"Failed to list mailbox '{folder_key}' for {user.email}: {e}")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -12,6 +12,7 @@ try:
         # App
         APP_NAME: str = "ConnexxionEngine"
         DEBUG: bool = False
+        LOG_FILE: Optional[str] = Field(default=None, description="Also write logs to this file (off by default)")
 
         # Security
         AES_SECRET_KEY: str = Field(..., description="AES encryption key for secrets")
@@ -24,6 +25,7 @@ try:
         # IMAP
         IMAP_USE_SSL: bool = True
         IMAP_TIMEOUT_SECONDS: int = 30
+        IMAP_COMPRESS: bool = Field(default=False, description="Enable COMPRESS=DEFLATE when the server supports it (one extra round-trip per connection)")
 
         # Connection Pool
         MAX_CONNECTIONS: int = Field(default=50, description="Maximum connections per pool")
@@ -65,10 +67,12 @@ except Exception:
         IMAP_TIMEOUT_SECONDS: int = int(os.getenv("IMAP_TIMEOUT_SECONDS", "15"))
         SMTP_USE_SSL: bool = os.getenv("SMTP_USE_SSL", "true").lower() == "true"
         IMAP_USE_SSL: bool = os.getenv("IMAP_USE_SSL", "true").lower() == "true"
+        IMAP_COMPRESS: bool = os.getenv("IMAP_COMPRESS", "false").lower() == "true"
         GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
         GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
         APP_NAME: str = os.getenv("APP_NAME", "ConnexxionEngine")
         DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
+        LOG_FILE: str = os.getenv("LOG_FILE", "")
         # Comma-separated list of origins, e.g. http://localhost:5173,http://localhost:3000
         CORS_ORIGINS: list[str] = [o.strip() for o in os.getenv("CORS_ORIGINS", "").split(",") if o.strip()]
 
@@ -3,9 +3,11 @@ import logging
 from typing import Dict, Optional, Tuple, Any
 from dataclasses import dataclass
 from contextlib import asynccontextmanager
+from functools import lru_cache
 import aioimaplib
 import aiosmtplib
 import ssl
+import zlib
 from opentelemetry import trace
 
 from .config import get_settings
@@ -18,6 +20,26 @@ tracer = trace.get_tracer(__name__)
 CLEANUP_TIMEOUT = 5
 
 
+@lru_cache()
+def get_ssl_context() -> ssl.SSLContext:
+    """Shared client SSL context, so the system CA store is loaded once instead of per connection."""
+    return ssl.create_default_context()
+
+
+class _DeflateTransport:
+    """Transport proxy that deflates outgoing data once COMPRESS=DEFLATE (RFC 4978) is active."""
+    
+    def __init__(self, transport):
+        self._transport = transport
+        self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    
+    def write(self, data: bytes) -> None:
+        self._transport.write(self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH))
+    
+    def __getattr__(self, name):
+        return getattr(self._transport, name)
+
+
 @dataclass
 class ConnectionKey:
     """Unique identifier for email connections"""
@@ -186,7 +208,7 @@ class ConnectionPool:
                     conn.last_used = asyncio.get_event_loop().time()
                     logger.debug(f"Released SMTP connection for {user.email}")
     
-    async def _create_imap_connection(self, user) -> aioimaplib.IMAP4_SSL:
+    async def _create_imap_connection(self, user, compress: Optional[bool] = None) -> aioimaplib.IMAP4_SSL:
         """Create new IMAP connection"""
         with tracer.start_as_current_span("create_imap_connection"):
             # Handle both encrypted (database mode) and plain text (stateless mode) passwords
@@ -200,22 +222,72 @@ class ConnectionPool:
                 # Direct password (stateless mode)
                 password = getattr(user, 'password', '')
             
-            # Create SSL context
-            ssl_context = ssl.create_default_context()
-            
             # Create connection
             imap_client = aioimaplib.IMAP4_SSL(
                 host=user.imap_host,
                 port=user.imap_port,
-                ssl_context=ssl_context,
+                ssl_context=get_ssl_context(),
                 timeout=self.settings.IMAP_TIMEOUT_SECONDS
             )
             
             await imap_client.wait_hello_from_server()
-            await imap_client.login(user.email, password)
+            response = await imap_client.login(user.email, password)
+            if response.result != 'OK':
+                # aioimaplib returns a NO instead of raising, don't hand out an unauthenticated client
+                self._discard_imap_client(imap_client)
+                raise ConnectionError(f"IMAP login failed for {user.email}: {response.result}")
+            
+            if compress is None:
+                compress = getattr(self.settings, 'IMAP_COMPRESS', False)
+            if compress:
+                try:
+                    await self._enable_imap_compression(imap_client)
+                except Exception as e:
+                    # The stream may be half switched to DEFLATE, so the client can't be trusted anymore
+                    logger.warning("IMAP COMPRESS=DEFLATE failed for %s, reconnecting without it: %s", user.email, e)
+                    self._discard_imap_client(imap_client)
+                    return await self._create_imap_connection(user, compress=False)
             
             return imap_client
     
+    @staticmethod
+    def _discard_imap_client(imap_client: aioimaplib.IMAP4_SSL) -> None:
+        """Drop a connection whose protocol state is unknown without sending anything on it."""
+        try:
+            imap_client.protocol.transport.close()
+        except Exception as e:
+            logger.debug("Closing discarded IMAP transport failed: %s", e)
+    
+    async def _enable_imap_compression(self, imap_client: aioimaplib.IMAP4_SSL) -> bool:
+        """Switch the connection to COMPRESS=DEFLATE when the server advertises it.
+        
+        aioimaplib has no built-in support, so after the server accepts the
+        command we decompress incoming data before the protocol parses it and
+        wrap the transport so outgoing commands are deflated.
+        """
+        protocol = imap_client.protocol
+        if not any('COMPRESS=DEFLATE' in cap for cap in protocol.capabilities):
+            return False
+        
+        response = await asyncio.wait_for(
+            protocol.execute(aioimaplib.Command('COMPRESS', protocol.new_tag(), 'DEFLATE', loop=protocol.loop)),
+            timeout=self.settings.IMAP_TIMEOUT_SECONDS
+        )
+        if response.result != 'OK':
+            return False
+        
+        decompressor = zlib.decompressobj(-15)
+        data_received = protocol.data_received
+        
+        def _inflating_data_received(data: bytes) -> None:
+            chunk = decompressor.decompress(data)
+            if chunk:
+                data_received(chunk)
+        
+        protocol.data_received = _inflating_data_received
+        protocol.transport = _DeflateTransport(protocol.transport)
+        return True
+    
     async def _create_smtp_connection(self, user) -> aiosmtplib.SMTP:
         """Create new SMTP connection"""
         with tracer.start_as_current_span("create_smtp_connection"):
@@ -235,6 +307,7 @@ class ConnectionPool:
                 hostname=user.smtp_host,
                 port=user.smtp_port,
                 use_tls=self.settings.SMTP_USE_SSL,
+                tls_context=get_ssl_context(),
                 timeout=self.settings.SMTP_TIMEOUT_SECONDS
             )
             
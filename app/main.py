@@ -1,4 +1,7 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
@@ -9,14 +12,23 @@ from .api.routes.connect import router as connect_router
 from .api.routes.emails import router as emails_router
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('email_engine.log') if not get_settings().DEBUG else logging.NullHandler()
-    ]
-)
+# Records are handed to a queue and written by a listener thread, so file/console I/O
+# never blocks the event loop. force=True because the route modules imported above
+# already called basicConfig.
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers: list[logging.Handler] = [logging.StreamHandler()]
+# Logs contain mailbox addresses and subjects, so writing them to disk is opt-in
+if get_settings().LOG_FILE:
+    _log_handlers.append(logging.FileHandler(get_settings().LOG_FILE))
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue = queue.SimpleQueue()
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler], force=True)
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -30,7 +42,7 @@ async def lifespan(app: FastAPI):
         connection_keepalive_worker(pool, settings.CONNECTION_CLEANUP_INTERVAL)
     )
     
-    logging.info(f"Started {settings.APP_NAME} with connection pooling (keepalive every {settings.CONNECTION_CLEANUP_INTERVAL}s, evict after {getattr(settings, 'MAX_IDLE_TIME', 180)}s)")
+    logging.info("Started %s with connection pooling (keepalive every %ss, evict after %ss)", settings.APP_NAME, settings.CONNECTION_CLEANUP_INTERVAL, getattr(settings, 'MAX_IDLE_TIME', 180))
     
     yield
     
@@ -53,7 +65,7 @@ async def connection_keepalive_worker(pool, interval: int):
         except asyncio.CancelledError:
             break
         except Exception as e:
-            logging.error(f"Connection keepalive error: {e}")
+            logging.error("Connection keepalive error: %s", e)
 
 settings = get_settings()
 app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
@@ -1,14 +1,18 @@
 import re
+from functools import lru_cache
 from typing import Literal
 
 from ..core.config import get_settings
 
+_TAG_RE = re.compile(r"<[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+
 
 def _strip_html(value: str) -> str:
     if not value:
         return ""
-    no_tags = re.sub(r"<[^>]+>", " ", value)
-    normalized = re.sub(r"\s+", " ", no_tags).strip()
+    no_tags = _TAG_RE.sub(" ", value)
+    normalized = _WHITESPACE_RE.sub(" ", no_tags).strip()
     return normalized
 
 
@@ -21,12 +25,18 @@ def _load_genai():
     return genai, types
 
 
-def _build_client():
+@lru_cache(maxsize=1)
+def _client_for_key(api_key: str):
+    # One client per key so its HTTP connection pool is kept alive across requests
     genai, _ = _load_genai()
+    return genai.Client(api_key=api_key)
+
+
+def _build_client():
     settings = get_settings()
     if not settings.GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY is not configured")
-    return genai.Client(api_key=settings.GEMINI_API_KEY)
+    return _client_for_key(settings.GEMINI_API_KEY)
 
 
 def generate_draft_from_prompt(
@@ -3,6 +3,7 @@ Attachment handling module for email service.
 Handles attachment processing, encoding, and content type detection.
 """
 import base64
+import re
 from typing import List, Tuple, Optional
 from email.message import EmailMessage
 from email.header import decode_header, make_header
@@ -11,6 +12,9 @@ from email import policy
 from typing import Protocol
 
 
+_UNSAFE_FILENAME_RE = re.compile(r'[<>:"/\\|?*]')
+
+
 class UserLike(Protocol):
     email: str
     encrypted_password: str
@@ -20,6 +24,15 @@ class UserLike(Protocol):
     imap_port: int
 
 
+def _decode_fast(value: Optional[str]) -> Optional[str]:
+    """Decode RFC 2047 encoded-words, skipping the parser for plain values."""
+    if value is None:
+        return None
+    if "=?" not in value:
+        return value
+    return str(make_header(decode_header(value)))
+
+
 def guess_content_type(filename: str) -> str:
     """Guess content type based on file extension."""
     ft = filename.lower()
@@ -73,36 +86,6 @@ def add_attachments_to_message(msg: EmailMessage, attachments: List[Tuple[str, O
         msg.add_attachment(content, maintype=maintype, subtype=subtype, filename=filename)
 
 
-def extract_attachments_from_message(msg) -> List[str]:
-    """Extract attachment filenames from an email message."""
-    attachments: List[str] = []
-    
-    if msg.is_multipart():
-        for part in msg.walk():
-            disp = (part.get_content_disposition() or "").lower()
-            if disp == "attachment":
-                filename = part.get_filename()
-                if filename:
-                    try:
-                        filename = str(make_header(decode_header(filename)))
-                    except Exception:
-                        pass
-                    attachments.append(filename)
-    else:
-        # Single part message might have attachment-like content
-        disp = (msg.get_content_disposition() or "").lower()
-        if disp == "attachment":
-            filename = msg.get_filename()
-            if filename:
-                try:
-                    filename = str(make_header(decode_header(filename)))
-                except Exception:
-                    pass
-                attachments.append(filename)
-    
-    return attachments
-
-
 def find_attachment_in_message(msg, target_filename: str) -> Tuple[bytes, str, str] | None:
     """Find and extract a specific attachment from an email message.
     
@@ -118,7 +101,7 @@ def find_attachment_in_message(msg, target_filename: str) -> Tuple[bytes, str, s
             
         part_name = part.get_filename() or ""
         try:
-            part_name = str(make_header(decode_header(part_name)))
+            part_name = _decode_fast(part_name)
         except Exception:
             pass
             
@@ -166,9 +149,8 @@ def validate_attachment_size(content: bytes, max_size_mb: int = 25) -> bool:
 
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe storage/transmission."""
-    import re
     # Remove or replace dangerous characters
-    sanitized = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    sanitized = _UNSAFE_FILENAME_RE.sub('_', filename)
     # Remove leading/trailing spaces and dots
     sanitized = sanitized.strip(' .')
     # Ensure it's not empty
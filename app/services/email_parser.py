@@ -2,18 +2,29 @@
 Email parsing and formatting module.
 Handles email content parsing, header processing, and message formatting.
 """
+import re
 import time
 from datetime import datetime
 from email.message import EmailMessage
-from email.header import decode_header, make_header
 from email.parser import BytesParser
 from email import policy
-from email.utils import getaddresses, formataddr, formatdate, make_msgid, parsedate_to_datetime
+from email.utils import getaddresses, formatdate, make_msgid, parsedate_to_datetime
 from typing import List, Optional, Tuple, Any, Dict
-from .attachment_handler import extract_attachments_from_message
+from .attachment_handler import _decode_fast
 from typing import Protocol
 
 
+# Matches `Name <addr>`, `"Quoted, Name" <addr>` and bare `addr` entries of an address header.
+_ADDR_RE = re.compile(r'(?:"([^"]*)"|([^<>",;:@]*?))\s*<([^<>\s]+@[^<>\s]+)>|([^<>",;:\s]+@[^<>",;:\s]+)')
+_ADDR_SPECIALS = frozenset('()<>@,:;.[]"\\')
+# RFC 2047 encoded-words, hidden while an address header is split so a decoded "," or "@"
+# in a display name can't be read as address syntax
+_ENCODED_WORD_RE = re.compile(r'=\?[^?\s]+\?[bBqQ]\?[^?\s]*\?=')
+_ENCODED_WORD_MARK_RE = re.compile(r'\x00(\d+)\x00')
+# Header fields read by the list view, matched on raw bytes
+_HDR_RE = re.compile(rb'^(Subject|From|To|Date|Content-Disposition):[ \t]*(.*)$', re.I)
+
+
 class UserLike(Protocol):
     email: str
     encrypted_password: str
@@ -50,27 +61,62 @@ def _infer_importance_from_headers(headers: dict) -> bool:
     return False
 
 
+def _format_addr(name: str, addr: str) -> str:
+    """Format a (name, address) pair, quoting the name like formataddr but without re-encoding it."""
+    if not name:
+        return addr
+    if _ADDR_SPECIALS.isdisjoint(name):
+        return f"{name} <{addr}>"
+    escaped = name.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}" <{addr}>'
+
+
+def _quick_addrs(header: Optional[str]) -> List[str]:
+    """Split an address header into formatted addresses without the full RFC 5322 parser.
+    Group syntax, comments and escaped quotes are rare, so those still go through getaddresses.
+    Encoded display names are decoded only after splitting.
+    """
+    if not header:
+        return []
+    header = str(header)
+    words: List[str] = []
+    if "=?" in header:
+        def _stash(match) -> str:
+            words.append(match.group(0))
+            return f"\x00{len(words) - 1}\x00"
+        header = _ENCODED_WORD_RE.sub(_stash, header)
+    if ":" in header or ";" in header or "(" in header or "\\" in header:
+        pairs = [(name, addr) for name, addr in getaddresses([header]) if addr]
+    else:
+        pairs = [((quoted or bare).strip(), angled or plain) for quoted, bare, angled, plain in _ADDR_RE.findall(header)]
+    if not words:
+        return [_format_addr(name, addr) for name, addr in pairs]
+    def restore(value: str) -> str:
+        return _ENCODED_WORD_MARK_RE.sub(lambda m: words[int(m.group(1))], value)
+    addrs: List[str] = []
+    for name, addr in pairs:
+        name = restore(name)
+        try:
+            name = _decode_fast(name)
+        except Exception:
+            pass
+        addrs.append(_format_addr(name, restore(addr)))
+    return addrs
+
+
 def parse_email_headers(msg) -> Dict[str, Any]:
     """Parse email headers into a standardized format."""
     # Subject
-    dh = decode_header(msg.get("Subject", ""))
-    subject = str(make_header(dh)) if dh else None
+    subject = _decode_fast(msg.get("Subject", ""))
     
     # From
-    from_parsed = getaddresses([msg.get("From", "")])
-    from_addr = formataddr(from_parsed[0]) if from_parsed else None
-    
-    # To
-    to_parsed = getaddresses([msg.get("To", "")])
-    to_addrs = [formataddr(t) for t in to_parsed] if to_parsed else []
+    from_parsed = _quick_addrs(msg.get("From"))
+    from_addr = from_parsed[0] if from_parsed else None
     
-    # CC
-    cc_parsed = getaddresses([msg.get("Cc", "")])
-    cc_addrs = [formataddr(t) for t in cc_parsed] if cc_parsed else []
-    
-    # BCC
-    bcc_parsed = getaddresses([msg.get("Bcc", "")])
-    bcc_addrs = [formataddr(t) for t in bcc_parsed] if bcc_parsed else []
+    # To / CC / BCC
+    to_addrs = _quick_addrs(msg.get("To"))
+    cc_addrs = _quick_addrs(msg.get("Cc"))
+    bcc_addrs = _quick_addrs(msg.get("Bcc"))
     
     # Date
     date_str = msg.get("Date", "")
@@ -92,103 +138,81 @@ def parse_email_headers(msg) -> Dict[str, Any]:
     }
 
 
-def parse_email_body(msg) -> Dict[str, Optional[str]]:
-    """Parse email body content (text and HTML)."""
+def _part_text(part) -> Optional[str]:
+    """Return the decoded text of a single MIME part, falling back to the raw payload."""
+    try:
+        return part.get_content()
+    except Exception:
+        try:
+            payload = part.get_payload(decode=True)
+            if payload:
+                return payload.decode(errors="ignore")
+        except Exception:
+            pass
+    return None
+
+
+def parse_email_content(msg) -> Dict[str, Any]:
+    """Parse body content (text and HTML) and attachment filenames in a single MIME walk.
+
+    Attachment payloads are never decoded here, only their filenames are read.
+    Plain text parts are skipped once an HTML body is found, since HTML is preferred.
+    """
     import logging
     logger = logging.getLogger(__name__)
-    
+
     text_body: Optional[str] = None
     html_body: Optional[str] = None
-    
-    logger.debug(f"Parsing email body - is_multipart: {msg.is_multipart()}")
-    
-    if msg.is_multipart():
-        for part in msg.walk():
-            disp = (part.get_content_disposition() or "").lower()
-            ctype = part.get_content_type()
-            
-            logger.debug(f"Processing part: content_type={ctype}, disposition={disp}")
-            
-            if disp == "attachment":
-                continue
-            elif ctype == "text/plain" and text_body is None:
-                try:
-                    text_body = part.get_content()
-                    logger.debug(f"Extracted text body: {len(text_body) if text_body else 0} chars")
-                except Exception as e:
-                    logger.debug(f"Failed to get text content: {e}")
-                    try:
-                        payload = part.get_payload(decode=True)
-                        if payload:
-                            text_body = payload.decode(errors="ignore")
-                            logger.debug(f"Extracted text body from payload: {len(text_body)} chars")
-                    except Exception as e2:
-                        logger.debug(f"Failed to get text payload: {e2}")
-            elif ctype == "text/html" and html_body is None:
-                try:
-                    html_body = part.get_content()
-                    logger.debug(f"Extracted HTML body: {len(html_body) if html_body else 0} chars")
-                except Exception as e:
-                    logger.debug(f"Failed to get HTML content: {e}")
-                    try:
-                        payload = part.get_payload(decode=True)
-                        if payload:
-                            html_body = payload.decode(errors="ignore")
-                            logger.debug(f"Extracted HTML body from payload: {len(html_body)} chars")
-                    except Exception as e2:
-                        logger.debug(f"Failed to get HTML payload: {e2}")
-    else:
-        # Single part message
-        ctype = msg.get_content_type()
-        logger.debug(f"Single part message: content_type={ctype}")
-        
-        if ctype == "text/plain":
-            try:
-                text_body = msg.get_content()
-                logger.debug(f"Extracted single text body: {len(text_body) if text_body else 0} chars")
-            except Exception as e:
-                logger.debug(f"Failed to get single text content: {e}")
-                try:
-                    payload = msg.get_payload(decode=True)
-                    if payload:
-                        text_body = payload.decode(errors="ignore")
-                        logger.debug(f"Extracted single text body from payload: {len(text_body)} chars")
-                except Exception as e2:
-                    logger.debug(f"Failed to get single text payload: {e2}")
-        elif ctype == "text/html":
-            try:
-                html_body = msg.get_content()
-                logger.debug(f"Extracted single HTML body: {len(html_body) if html_body else 0} chars")
-            except Exception as e:
-                logger.debug(f"Failed to get single HTML content: {e}")
+    attachments: List[str] = []
+
+    # walk() yields the message itself for single part messages
+    for part in msg.walk():
+        # Disposition first: an attached message/rfc822 is a multipart container too
+        disp = (part.get_content_disposition() or "").lower()
+        if disp == "attachment":
+            filename = part.get_filename()
+            if filename:
                 try:
-                    payload = msg.get_payload(decode=True)
-                    if payload:
-                        html_body = payload.decode(errors="ignore")
-                        logger.debug(f"Extracted single HTML body from payload: {len(html_body)} chars")
-                except Exception as e2:
-                    logger.debug(f"Failed to get single HTML payload: {e2}")
-    
-    # Prefer HTML body, fallback to text body
+                    filename = _decode_fast(filename)
+                except Exception:
+                    pass
+                attachments.append(filename)
+            continue
+
+        if part.is_multipart():
+            continue
+
+        ctype = part.get_content_type()
+        if ctype == "text/html" and html_body is None:
+            html_body = _part_text(part)
+        elif ctype == "text/plain" and text_body is None and html_body is None:
+            text_body = _part_text(part)
+
+    # Prefer HTML body, drop the text body early when HTML is present
+    if html_body:
+        text_body = None
     body = html_body if html_body else text_body
-    
+    logger.debug("Parsed email content: body_length=%s, attachments=%s", len(body) if body else 0, len(attachments))
+
     return {
         "body": body,
         "text_body": text_body,
-        "html_body": html_body
+        "html_body": html_body,
+        "attachments": attachments,
+        "has_attachments": len(attachments) > 0
     }
 
 
 def parse_email_flags(flags_blob: bytes) -> Dict[str, bool]:
     """Parse IMAP flags from response."""
-    flags_str = flags_blob.decode(errors="ignore").lower()
+    flags = bytes(flags_blob).lower()
     
     return {
-        "is_read": r"\seen" in flags_str,
-        "is_flagged": r"\flagged" in flags_str,
-        "is_draft": r"\draft" in flags_str,
-        "is_answered": r"\answered" in flags_str,
-        "is_deleted": r"\deleted" in flags_str
+        "is_read": rb"\seen" in flags,
+        "is_flagged": rb"\flagged" in flags,
+        "is_draft": rb"\draft" in flags,
+        "is_answered": rb"\answered" in flags,
+        "is_deleted": rb"\deleted" in flags
     }
 
 
@@ -235,6 +259,59 @@ def create_email_message(
     return msg
 
 
+def _parse_header_bytes(raw: bytes) -> Dict[str, str]:
+    """Extract the list view header fields from a raw header block without building a message.
+    Folded lines are unfolded in a single pass and RFC 2047 decoding only runs on values containing "=?"
+    (From and To are left encoded for _quick_addrs).
+    """
+    raw_fields: Dict[str, List[bytes]] = {}
+    current: Optional[List[bytes]] = None
+    for line in raw.splitlines():
+        if not line:
+            break  # end of the header block
+        if line[:1] in (b" ", b"\t"):
+            if current is not None:
+                current.append(line)
+            continue
+        current = None
+        match = _HDR_RE.match(line)
+        if match:
+            name = match.group(1).lower().decode()
+            if name not in raw_fields:
+                current = raw_fields[name] = [match.group(2)]
+
+    fields: Dict[str, str] = {}
+    for name, parts in raw_fields.items():
+        value = b"".join(parts).decode("utf-8", errors="replace").strip()
+        # Address headers are decoded per display name by _quick_addrs, after splitting
+        if "=?" in value and name not in ("from", "to"):
+            try:
+                value = _decode_fast(value)
+            except Exception:
+                pass
+        fields[name] = value
+    return fields
+
+
+def parse_summary_headers(raw_bytes: bytes, flags_blob: bytes = b"") -> Dict[str, Any]:
+    """Parse the fields needed for a list summary from a FETCH header block."""
+    fields = _parse_header_bytes(raw_bytes)
+    from_parsed = _quick_addrs(fields.get("from"))
+    date_str = fields.get("date", "")
+    # Only a top level attachment disposition is visible from the headers alone
+    disposition = fields.get("content-disposition", "").lower()
+
+    return {
+        "subject": fields.get("subject", ""),
+        "from": from_parsed[0] if from_parsed else None,
+        "to": _quick_addrs(fields.get("to")),
+        "date": date_str,
+        "timestamp": _parse_timestamp(date_str),
+        "has_attachments": disposition.startswith("attachment") and "filename" in disposition,
+        **parse_email_flags(flags_blob)
+    }
+
+
 def parse_full_email(raw_bytes: bytes, flags_blob: bytes = b"") -> Dict[str, Any]:
     """Parse a complete email from raw bytes."""
     try:
@@ -245,22 +322,17 @@ def parse_full_email(raw_bytes: bytes, flags_blob: bytes = b"") -> Dict[str, Any
     # Parse headers
     headers = parse_email_headers(msg)
     
-    # Parse body
-    body = parse_email_body(msg)
+    # Parse body and attachments
+    content = parse_email_content(msg)
     
     # Parse flags
     flags = parse_email_flags(flags_blob)
     
-    # Extract attachments
-    attachments = extract_attachments_from_message(msg)
-    
     # Combine all data
     return {
         **headers,
-        **body,
-        **flags,
-        "attachments": attachments,
-        "has_attachments": len(attachments) > 0
+        **content,
+        **flags
     }
 
 
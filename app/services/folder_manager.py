@@ -2,8 +2,12 @@
 Folder management module for email service.
 Handles folder discovery, classification, and resolution.
 """
+import asyncio
 import ssl
+import time
+from collections import OrderedDict
 from typing import Optional, List, Dict, Set, Tuple
+import aioimaplib
 from ..core.config import get_settings
 from ..core.security import decrypt_secret
 from ..core.connection_pool import get_imap_client
@@ -21,6 +25,23 @@ class UserLike(Protocol):
 
 _FOLDER_CACHE: dict[str, dict[str, str]] = {}
 
+# Last LIST result per account, keyed by (imap_host, imap_port, email) -> (expiry in monotonic seconds, folders),
+# least recently used first
+_FOLDER_LIST_CACHE: "OrderedDict[tuple[str, int, str], tuple[float, list[dict]]]" = OrderedDict()
+_FOLDER_LIST_CACHE_MAX = 500
+_FOLDER_LIST_TTL = 300
+
+# Folders the server refused to select, keyed by (imap_host, imap_port, email, folder) -> expiry (monotonic seconds),
+# oldest first
+_MISSING_FOLDER_CACHE: "OrderedDict[tuple[str, int, str, str], float]" = OrderedDict()
+_MISSING_FOLDER_CACHE_MAX = 1000
+_MISSING_FOLDER_TTL = 600
+
+
+def _account_key(user: UserLike) -> tuple[str, int, str]:
+    """Identify a mailbox by server and login, since both come from client-supplied credentials."""
+    return (user.imap_host, int(user.imap_port), user.email)
+
 
 # Attribute mapping for folder classification (RFC 6154 / XLIST)
 _ATTR_MAP = {
@@ -38,6 +59,62 @@ _ATTR_MAP = {
 }
 
 
+# Lower-cased folder hint -> standardized key, built once instead of scanning sets per call
+_FOLDER_HINT_KEYS: dict[str, str] = {
+    "inbox": "inbox",
+    "sent": "sent",
+    "sent items": "sent",
+    "sent messages": "sent",
+    "sent mail": "sent",
+    "draft": "drafts",
+    "drafts": "drafts",
+    "spam": "spam",
+    "junk": "spam",
+    "junk email": "spam",
+    "junk e-mail": "spam",
+    "bulk": "spam",
+    "bulk mail": "spam",
+    "trash": "trash",
+    "deleted items": "trash",
+    "deleted messages": "trash",
+    "bin": "trash",
+    "archive": "archive",
+    "all mail": "archive",
+}
+
+
+# Name fragments checked in order by _classify_folder when no attribute matched
+# ("sent" also covers "sent items", "sent messages" and "sent mail")
+_NAME_HINTS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("sent", ("sent",)),
+    ("drafts", ("draft",)),
+    ("trash", ("trash", "deleted", "bin")),
+    ("spam", ("spam", "junk", "bulk")),
+    ("archive", ("archive", "all mail")),
+)
+
+# Common provider paths per standardized key, in order of preference
+_SPECIAL_CANDIDATES: dict[str, tuple[str, ...]] = {
+    "sent": ("Sent", "Sent Items", "Sent Messages", "Sent Mail", "[Gmail]/Sent Mail", "INBOX.Sent", "INBOX.sent", "INBOX/Sent"),
+    "drafts": ("Drafts", "[Gmail]/Drafts", "INBOX.Drafts", "INBOX.drafts", "INBOX/Drafts"),
+    "trash": ("Trash", "[Gmail]/Trash", "Deleted Items", "Deleted Messages", "Bin", "INBOX.Trash", "INBOX.trash", "INBOX/Trash"),
+    "spam": ("Spam", "[Gmail]/Spam", "Junk", "Junk Email", "Junk E-mail", "Bulk", "Bulk Mail", "INBOX.Spam", "INBOX.spam", "INBOX/Spam"),
+    "archive": ("Archive", "[Gmail]/All Mail", "All Mail", "[Gmail]/Archive", "INBOX.Archive", "INBOX.archive", "INBOX/Archive"),
+}
+_SPECIAL_CANDIDATES["junk"] = _SPECIAL_CANDIDATES["spam"]
+
+_FALLBACK_DELIMS = (".", "/", "\\")
+
+_DISPLAY_NAMES = {
+    "inbox": "Inbox",
+    "sent": "Sent",
+    "drafts": "Drafts",
+    "spam": "Spam",
+    "trash": "Trash",
+    "archive": "Archive",
+}
+
+
 def _decode_imap_bytes(b: bytes) -> str:
     try:
         return b.decode("utf-8")
@@ -74,7 +151,7 @@ def _leaf_name(path: str, delim: str) -> str:
     if delim and delim != "NIL" and delim in path:
         leaf = path.split(delim)[-1]
     else:
-        for d in [".", "/", "\\"]:
+        for d in _FALLBACK_DELIMS:
             if d in path:
                 leaf = path.split(d)[-1]
                 break
@@ -98,28 +175,67 @@ def _classify_folder(name: str, attrs: set[str], delim: str) -> str:
     elif n.startswith("inbox/"):
         folder_basename = n[6:]  # Remove "inbox/" prefix
     
-    if any(x in folder_basename for x in ["sent", "sent items", "sent messages", "sent mail"]):
-        return "sent"
-    elif "draft" in folder_basename:
-        return "drafts"
-    elif any(x in folder_basename for x in ["trash", "deleted", "bin"]):
-        return "trash"
-    elif any(x in folder_basename for x in ["spam", "junk", "bulk"]):
-        return "spam"
-    elif any(x in folder_basename for x in ["archive", "all mail"]):
-        return "archive"
-    elif n in {"inbox", "inbox/"} or folder_basename == "inbox":
+    for ftype, fragments in _NAME_HINTS:
+        if any(x in folder_basename for x in fragments):
+            return ftype
+    if n in {"inbox", "inbox/"} or folder_basename == "inbox":
         return "inbox"
     return "custom"
 
 
-async def _collect_provider_folders(user: UserLike) -> list[dict]:
-    """Collect folders from provider using LIST command, parse and classify."""
+async def _collect_provider_folders(user: UserLike, imap=None) -> list[dict]:
+    """Collect folders from provider using LIST command, parse and classify.
+    Reuses the caller's IMAP connection when given instead of opening a new one.
+    """
+    if imap is not None:
+        return await _list_provider_folders(imap)
+    async with get_imap_client(user) as imap:
+        return await _list_provider_folders(imap)
+
+
+async def _cached_provider_folders(user: UserLike, imap=None) -> list[dict]:
+    """Return the user's folder list, reusing a recent LIST so resolving several keys costs one round-trip."""
+    key = _account_key(user)
+    cached = _FOLDER_LIST_CACHE.get(key)
+    if cached is not None:
+        if cached[0] > time.monotonic():
+            _FOLDER_LIST_CACHE.move_to_end(key)
+            return cached[1]
+        _FOLDER_LIST_CACHE.pop(key, None)
+    folders = await _collect_provider_folders(user, imap)
+    _cache_folder_list(user, folders)
+    return folders
+
+
+def _cache_folder_list(user: UserLike, folders: list[dict]) -> None:
+    if not folders:
+        return
+    key = _account_key(user)
+    _FOLDER_LIST_CACHE[key] = (time.monotonic() + _FOLDER_LIST_TTL, folders)
+    _FOLDER_LIST_CACHE.move_to_end(key)
+    while len(_FOLDER_LIST_CACHE) > _FOLDER_LIST_CACHE_MAX:
+        _FOLDER_LIST_CACHE.popitem(last=False)
+
+
+async def _list_provider_folders(imap) -> list[dict]:
     import logging
     logger = logging.getLogger(__name__)
     
-    async with get_imap_client(user) as imap:
-        folders: list[dict] = []
+    folders: list[dict] = []
+    status, data = "NO", []
+    # Ask RFC 6154 servers to tag \Sent, \Junk, \Trash etc. explicitly so classification
+    # doesn't depend on localized folder names
+    if imap.has_capability("SPECIAL-USE"):
+        try:
+            protocol = imap.protocol
+            command = aioimaplib.Command("LIST", protocol.new_tag(), '""', "*", "RETURN", "(SPECIAL-USE)", loop=protocol.loop)
+            status, data = await asyncio.wait_for(protocol.execute(command), imap.timeout)
+            logger.info("LIST RETURN (SPECIAL-USE) status: %s, data length: %s", status, len(data) if data else 0)
+        except Exception as e:
+            logger.debug("LIST RETURN (SPECIAL-USE) failed, falling back to plain LIST: %s", e)
+            status, data = "BAD", []
+    
+    if status != "OK":
         # Use alternative LIST syntax that works
         try:
             logger.info("Using alternative LIST syntax")
@@ -128,43 +244,36 @@ async def _collect_provider_folders(user: UserLike) -> list[dict]:
         except Exception as e:
             logger.error(f"LIST command failed: {e}")
             status, data = "BAD", []
-        
-        if status == "OK" and data:
-            for line in data:
-                parsed = _parse_list_line(line)
-                if parsed:
-                    attrs, delim, name = parsed
-                    ftype = _classify_folder(name, attrs, delim)
-                    folders.append({"name": name, "type": ftype, "delim": delim})
-                    logger.debug(f"Found folder via LIST: {name} (type: {ftype})")
-        # Add display names
-        for folder in folders:
-            name = folder["name"]
-            delim = folder.get("delim", "/")
-            folder["display_name"] = _leaf_name(name, delim)
-        return folders
+    
+    if status == "OK" and data:
+        for line in data:
+            parsed = _parse_list_line(line)
+            if parsed:
+                attrs, delim, name = parsed
+                ftype = _classify_folder(name, attrs, delim)
+                folders.append({"name": name, "type": ftype, "delim": delim})
+                logger.debug(f"Found folder via LIST: {name} (type: {ftype})")
+    # Add display names
+    for folder in folders:
+        name = folder["name"]
+        delim = folder.get("delim", "/")
+        folder["display_name"] = _leaf_name(name, delim)
+    return folders
 
 
 async def list_folders(user: UserLike) -> list[dict]:
     """Return a list of folders with standardized type for frontend display."""
     folders = await _collect_provider_folders(user)
+    _cache_folder_list(user, folders)
     # Prefer a single entry per special type with a nice display name, but keep customs too
-    display_map = {
-        "inbox": "Inbox",
-        "sent": "Sent",
-        "drafts": "Drafts",
-        "spam": "Spam",
-        "trash": "Trash",
-        "archive": "Archive",
-    }
     result: list[dict] = []
     seen_types = set()
     for folder in folders:
         ftype = folder["type"]
-        if ftype in display_map and ftype not in seen_types:
+        if ftype in _DISPLAY_NAMES and ftype not in seen_types:
             result.append({
                 "name": folder["name"],
-                "display_name": display_map[ftype],
+                "display_name": _DISPLAY_NAMES[ftype],
                 "type": ftype,
             })
             seen_types.add(ftype)
@@ -177,9 +286,10 @@ async def list_folders(user: UserLike) -> list[dict]:
     return result
 
 
-async def resolve_special_folder(user: UserLike, key: str) -> str | None:
+async def resolve_special_folder(user: UserLike, key: str, imap=None) -> str | None:
     """Resolve a standardized key (inbox/sent/drafts/spam/trash/archive/junk) to the provider's actual folder path.
     Falls back to best heuristics if not found explicitly.
+    Pass the caller's open `imap` connection to avoid a second connection + LOGIN on a cache miss.
     """
     global _FOLDER_CACHE
     if user.email not in _FOLDER_CACHE:
@@ -188,7 +298,7 @@ async def resolve_special_folder(user: UserLike, key: str) -> str | None:
     if key in _FOLDER_CACHE[user.email]:
         return _FOLDER_CACHE[user.email][key]
         
-    folders = await _collect_provider_folders(user)
+    folders = await _cached_provider_folders(user, imap)
     
     resolved_path = None
     # First pass: exact type match
@@ -200,56 +310,16 @@ async def resolve_special_folder(user: UserLike, key: str) -> str | None:
     # Second pass: heuristics for common names
     if not resolved_path:
         if key == "inbox":
-            for folder in folders:
-                if folder["name"].upper() == "INBOX":
-                    resolved_path = folder["name"]
-                    break
-        elif key == "sent":
-            candidates = ["Sent", "Sent Items", "Sent Messages", "Sent Mail", "[Gmail]/Sent Mail", "INBOX.Sent", "INBOX.sent", "INBOX/Sent"]
-            for cand in candidates:
-                for folder in folders:
-                    if folder["name"] == cand:
-                        resolved_path = folder["name"]
-                        break
-                if resolved_path: break
-            if not resolved_path:
+            resolved_path = next((f["name"] for f in folders if f["name"].upper() == "INBOX"), None)
+        else:
+            names = {folder["name"] for folder in folders}
+            resolved_path = next((cand for cand in _SPECIAL_CANDIDATES.get(key, ()) if cand in names), None)
+            if not resolved_path and key == "sent":
                 for folder in folders:
                     fname = folder["name"].lower()
                     if "sent" in fname and "consent" not in fname:
                         resolved_path = folder["name"]
                         break
-        elif key == "drafts":
-            candidates = ["Drafts", "[Gmail]/Drafts", "INBOX.Drafts", "INBOX.drafts", "INBOX/Drafts"]
-            for cand in candidates:
-                for folder in folders:
-                    if folder["name"] == cand:
-                        resolved_path = folder["name"]
-                        break
-                if resolved_path: break
-        elif key == "trash":
-            candidates = ["Trash", "[Gmail]/Trash", "Deleted Items", "Deleted Messages", "Bin", "INBOX.Trash", "INBOX.trash", "INBOX/Trash"]
-            for cand in candidates:
-                for folder in folders:
-                    if folder["name"] == cand:
-                        resolved_path = folder["name"]
-                        break
-                if resolved_path: break
-        elif key == "spam" or key == "junk":
-            candidates = ["Spam", "[Gmail]/Spam", "Junk", "Junk Email", "Junk E-mail", "Bulk", "Bulk Mail", "INBOX.Spam", "INBOX.spam", "INBOX/Spam"]
-            for cand in candidates:
-                for folder in folders:
-                    if folder["name"] == cand:
-                        resolved_path = folder["name"]
-                        break
-                if resolved_path: break
-        elif key == "archive":
-            candidates = ["Archive", "[Gmail]/All Mail", "All Mail", "[Gmail]/Archive", "INBOX.Archive", "INBOX.archive", "INBOX/Archive"]
-            for cand in candidates:
-                for folder in folders:
-                    if folder["name"] == cand:
-                        resolved_path = folder["name"]
-                        break
-                if resolved_path: break
 
     if resolved_path:
         _FOLDER_CACHE[user.email][key] = resolved_path
@@ -257,6 +327,36 @@ async def resolve_special_folder(user: UserLike, key: str) -> str | None:
     return resolved_path
 
 
+def is_folder_missing(user: UserLike, folder: str) -> bool:
+    """Return True if the server recently refused to select this folder for the user."""
+    if folder.upper() == "INBOX":
+        return False
+    key = (*_account_key(user), folder)
+    expires = _MISSING_FOLDER_CACHE.get(key)
+    if expires is None:
+        return False
+    if expires <= time.monotonic():
+        _MISSING_FOLDER_CACHE.pop(key, None)
+        return False
+    return True
+
+
+def mark_folder_missing(user: UserLike, folder: str) -> None:
+    """Remember that a folder could not be selected so repeated requests skip the IMAP round-trip."""
+    if folder.upper() == "INBOX":
+        return
+    key = (*_account_key(user), folder)
+    now = time.monotonic()
+    _MISSING_FOLDER_CACHE.pop(key, None)
+    _MISSING_FOLDER_CACHE[key] = now + _MISSING_FOLDER_TTL
+    # Every entry has the same TTL, so insertion order is expiry order
+    while _MISSING_FOLDER_CACHE:
+        oldest_key, expires = next(iter(_MISSING_FOLDER_CACHE.items()))
+        if expires > now and len(_MISSING_FOLDER_CACHE) <= _MISSING_FOLDER_CACHE_MAX:
+            break
+        del _MISSING_FOLDER_CACHE[oldest_key]
+
+
 def resolve_special_folder_sync(user: UserLike, key: str) -> str | None:
     """Synchronous fallback that returns common folder names without IMAP lookup."""
     # Simple heuristics without IMAP connection
@@ -276,12 +376,4 @@ def resolve_special_folder_sync(user: UserLike, key: str) -> str | None:
 
 
 def _key_from_folder_hint(folder: str) -> str | None:
-    f = (folder or "").strip().lower()
-    if f in {"inbox", "sent", "sent items", "sent messages", "sent mail", "draft", "drafts", "spam", "junk", "junk email", "junk e-mail", "bulk", "bulk mail", "trash", "deleted items", "deleted messages", "bin", "archive", "all mail"}:
-        if f in {"sent items", "sent messages", "sent mail"}: return "sent"
-        if f in {"draft"}: return "drafts"
-        if f in {"junk", "junk email", "junk e-mail", "bulk", "bulk mail"}: return "spam"
-        if f in {"deleted items", "deleted messages", "bin"}: return "trash"
-        if f in {"all mail"}: return "archive"
-        return f
-    return None
+    return _FOLDER_HINT_KEYS.get((folder or "").strip().lower())
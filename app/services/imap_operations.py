@@ -2,21 +2,43 @@
 IMAP operations module for email service.
 Handles IMAP-specific operations like reading, moving, flagging emails.
 """
+import asyncio
 import imaplib
+import re
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import List, Optional, Tuple, Any, Dict
 from email.parser import BytesParser
 from email import policy
-from ..core.connection_pool import get_imap_client
+import aioimaplib
+from ..core.connection_pool import get_imap_client, get_ssl_context
 from ..core.config import get_settings
 from ..core.security import decrypt_secret
-from .folder_manager import _key_from_folder_hint, resolve_special_folder, resolve_special_folder_sync
-from .email_parser import parse_full_email, format_email_summary, _parse_timestamp, _infer_importance_from_headers
+from .folder_manager import _key_from_folder_hint, _SPECIAL_CANDIDATES, resolve_special_folder, resolve_special_folder_sync, is_folder_missing, mark_folder_missing, _account_key
+from .email_parser import parse_full_email, parse_summary_headers, parse_email_flags, format_email_summary, _parse_timestamp, _infer_importance_from_headers
 from .attachment_handler import find_attachment_in_message
 from typing import Protocol
 import imaplib
 
 
+_ESEARCH_ALL_RE = re.compile(rb"\bALL ([0-9:,]+)")
+_UIDVALIDITY_RE = re.compile(rb"UIDVALIDITY (\d+)")
+_FETCH_UID_RE = re.compile(rb"\bUID (\d+)")
+_FETCH_FLAGS_RE = re.compile(rb"FLAGS \([^)]*\)")
+_BODY_SIZE_RE = re.compile(r'BODY\[\](?:<\d+>)?\s*\{(\d+)\}')
+_BODY_CONTENT_RE = re.compile(r'BODY\[\]\s*\{\d+\}\r?\n(.+)', re.DOTALL)
+_EMAIL_HEADER_PREFIXES = (b"Return-Path:", b"Delivered-To:", b"From:", b"Subject:", b"Date:", b"Message-ID:")
+
+# Only the headers parse_summary_headers reads are requested for list pages
+_LIST_HEADER_FIELDS = ("SUBJECT", "FROM", "TO", "DATE", "CONTENT-DISPOSITION")
+_LIST_FETCH_SPEC = f"(UID FLAGS BODY.PEEK[HEADER.FIELDS ({' '.join(_LIST_HEADER_FIELDS)})])"
+_DETAIL_FETCH_LIMIT = 1048576
+_DETAIL_FETCH_SPEC = f"(BODY.PEEK[]<0.{_DETAIL_FETCH_LIMIT}> FLAGS)"
+_FLAGS_FETCH_SPEC = "(FLAGS)"
+_FULL_FETCH_SPEC = "(BODY.PEEK[])"
+
+
 class UserLike(Protocol):
     email: str
     encrypted_password: str
@@ -50,9 +72,11 @@ def _build_search_query(search_text: Optional[str] = None, is_starred: Optional[
     return " ".join(query_parts) if query_parts else "ALL"
 
 
-async def _safe_examine_folder(imap, folder: str, user_email: str) -> tuple[bool, str]:
+async def _safe_examine_folder(imap, folder: str, user_email: str) -> tuple[str, str, list]:
     """Safely select a folder with comprehensive error handling and logging.
     Uses SELECT instead of EXAMINE to ensure proper IMAP state for UID operations.
+    Returns (status, folder, select_response_lines), where status is the server's tagged
+    status ("OK", "NO", "BAD") or "ERROR" when the command itself failed (timeout, transport).
     """
     import logging
     logger = logging.getLogger(__name__)
@@ -61,29 +85,205 @@ async def _safe_examine_folder(imap, folder: str, user_email: str) -> tuple[bool
         # First check the current IMAP state
         state = getattr(imap, 'state', 'UNKNOWN')
         protocol_state = getattr(imap.protocol, 'state', 'UNKNOWN') if hasattr(imap, 'protocol') else 'UNKNOWN'
-        logger.info(f"IMAP state before folder access: client={state}, protocol={protocol_state}")
+        logger.info("IMAP state before folder access: client=%s, protocol=%s", state, protocol_state)
         
         # Use SELECT instead of EXAMINE to ensure proper state for UID operations
         # This is necessary because aioimaplib doesn't properly track state after EXAMINE
         status, response = await imap.select(folder)
-        logger.info(f"Select '{folder}' - Status: {status}, Response: {response}")
+        logger.info("Select '%s' - Status: %s, Response: %s", folder, status, response)
         
         if status == "OK":
             # Verify we're in the correct state after select
             new_state = getattr(imap, 'state', 'UNKNOWN')
             new_protocol_state = getattr(imap.protocol, 'state', 'UNKNOWN') if hasattr(imap, 'protocol') else 'UNKNOWN'
-            logger.info(f"IMAP state after select: client={new_state}, protocol={new_protocol_state}")
+            logger.info("IMAP state after select: client=%s, protocol=%s", new_state, new_protocol_state)
             
             # SELECT should put us in SELECTED state which allows UID operations
-            logger.info(f"Folder '{folder}' successfully selected - ready for UID operations")
-            return True, folder
+            logger.info("Folder '%s' successfully selected - ready for UID operations", folder)
+            return status, folder, response
         else:
-            logger.warning(f"SELECT failed for '{folder}' - Status: {status}, Response: {response}")
-            return False, folder
+            logger.warning("SELECT failed for '%s' - Status: %s, Response: %s", folder, status, response)
+            return status, folder, []
             
     except Exception as e:
-        logger.error(f"Exception during folder access of '{folder}' for {user_email}: {e}")
-        return False, folder
+        logger.error("Exception during folder access of '%s' for %s: %s", folder, user_email, e)
+        return "ERROR", folder, []
+
+
+# Parsed list summaries keyed by (imap_host, imap_port, email, folder, uidvalidity, uid), least recently used first.
+# Headers never change for a UID within one UIDVALIDITY epoch, only the flags do.
+_SUMMARY_CACHE: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_SUMMARY_CACHE_MAX = 2000
+# _iter_page runs in worker threads
+_SUMMARY_CACHE_LOCK = threading.Lock()
+
+
+def _iter_page(msg_data: list, folder: str, cache_scope: Optional[tuple] = None):
+    """Yield list summaries from a FETCH (UID FLAGS BODY.PEEK[HEADER.FIELDS ...]) response, one message at a time.
+    Each parsed message is released before the next one is parsed.
+    With a cache_scope of (imap_host, imap_port, email, folder, uidvalidity), messages parsed before are served
+    from the summary cache with only their flags refreshed.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+    
+    i = 0
+    while i < len(msg_data):
+        try:
+            item = msg_data[i]
+            
+            # Look for FETCH response line (bytes containing "FETCH")
+            if isinstance(item, bytes) and b"FETCH" in item:
+                logger.debug("Found FETCH response at %d: %r", i, item[:100])
+                
+                # Extract UID from response line
+                uid_match = _FETCH_UID_RE.search(item)
+                if uid_match is None:
+                    logger.debug("No UID found in response: %r", item)
+                    i += 1
+                    continue
+                uid = int(uid_match.group(1))
+                
+                # Look for header data in next item
+                header_bytes = b""
+                if i + 1 < len(msg_data):
+                    next_item = msg_data[i + 1]
+                    if isinstance(next_item, (bytes, bytearray)):
+                        header_bytes = bytes(next_item)
+                        logger.debug("Found header data for UID %d, length: %d", uid, len(header_bytes))
+                        i += 1  # Skip the header data item
+                
+                # Extract flags from response line
+                flags_match = _FETCH_FLAGS_RE.search(item)
+                flags_bytes = flags_match.group(0) if flags_match else b""
+                
+                cache_key = (*cache_scope, uid) if cache_scope is not None else None
+                if cache_key is not None:
+                    with _SUMMARY_CACHE_LOCK:
+                        cached = _SUMMARY_CACHE.get(cache_key)
+                        if cached is not None:
+                            _SUMMARY_CACHE.move_to_end(cache_key)
+                    if cached is not None:
+                        flags = parse_email_flags(flags_bytes)
+                        yield {**cached, "is_read": flags["is_read"], "is_flagged": flags["is_flagged"]}
+                        i += 1
+                        continue
+                
+                # Parse the email data
+                if header_bytes:
+                    email_data = parse_summary_headers(header_bytes, flags_bytes)
+                    del header_bytes
+                    if email_data:
+                        email_item = format_email_summary(email_data, uid, folder)
+                        del email_data
+                        if cache_key is not None:
+                            with _SUMMARY_CACHE_LOCK:
+                                _SUMMARY_CACHE[cache_key] = email_item
+                                while len(_SUMMARY_CACHE) > _SUMMARY_CACHE_MAX:
+                                    _SUMMARY_CACHE.popitem(last=False)
+                        logger.debug("Successfully parsed email UID %d", uid)
+                        yield email_item
+                    else:
+                        logger.debug("Failed to parse email data for UID %d", uid)
+                else:
+                    logger.debug("No header data found for UID %d", uid)
+            
+            i += 1
+        
+        except Exception as e:
+            logger.error("Error parsing email data at index %s: %s", i, e)
+            i += 1
+            continue
+
+
+_UIDNEXT_RE = re.compile(rb"UIDNEXT (\d+)")
+_HIGHESTMODSEQ_RE = re.compile(rb"HIGHESTMODSEQ (\d+)")
+_EXISTS_RE = re.compile(rb"^(\d+) EXISTS")
+
+# SEARCH results keyed by (imap_host, imap_port, email, folder, query) -> (mailbox state, sequence numbers)
+_SEARCH_CACHE: "OrderedDict[tuple, tuple[tuple, list[int]]]" = OrderedDict()
+_SEARCH_CACHE_MAX = 200
+
+
+def _mailbox_state(select_lines) -> Optional[tuple]:
+    """Return (UIDVALIDITY, UIDNEXT, EXISTS, HIGHESTMODSEQ) from a SELECT response.
+    Only servers reporting HIGHESTMODSEQ (CONDSTORE) expose flag changes this way,
+    so None is returned without it and nothing is cached.
+    """
+    uidvalidity = uidnext = exists = modseq = None
+    for line in select_lines or []:
+        if not isinstance(line, (bytes, bytearray)):
+            continue
+        if (match := _UIDVALIDITY_RE.search(line)):
+            uidvalidity = int(match.group(1))
+        elif (match := _UIDNEXT_RE.search(line)):
+            uidnext = int(match.group(1))
+        elif (match := _HIGHESTMODSEQ_RE.search(line)):
+            modseq = int(match.group(1))
+        elif (match := _EXISTS_RE.match(line)):
+            exists = int(match.group(1))
+    if None in (uidvalidity, uidnext, exists, modseq):
+        return None
+    return uidvalidity, uidnext, exists, modseq
+
+
+def _expand_sequence_set(seq_set: bytes) -> list[int]:
+    """Expand an IMAP sequence set such as b"1:3,7,10:12" into a list of numbers."""
+    numbers: list[int] = []
+    for part in seq_set.split(b","):
+        if not part:
+            continue
+        start, sep, end = part.partition(b":")
+        if sep:
+            lo, hi = sorted((int(start), int(end)))
+            numbers.extend(range(lo, hi + 1))
+        else:
+            numbers.append(int(start))
+    return numbers
+
+
+def _compress_sequence_set(numbers: list[int]) -> str:
+    """Collapse sequence numbers into IMAP set syntax, e.g. [12, 11, 10, 7] -> "10:12,7"."""
+    runs: list[str] = []
+    ordered = sorted(numbers, reverse=True)
+    i = 0
+    while i < len(ordered):
+        hi = lo = ordered[i]
+        while i + 1 < len(ordered) and ordered[i + 1] == lo - 1:
+            i += 1
+            lo = ordered[i]
+        runs.append(f"{lo}:{hi}" if lo != hi else str(hi))
+        i += 1
+    return ",".join(runs)
+
+
+async def _search_sequence_numbers(imap, search_query: str) -> Optional[list[int]]:
+    """Return the sequence numbers matching search_query, or None if SEARCH failed.
+    Uses ESEARCH (RFC 4731) when the server supports it so the result comes back as
+    a compact sequence set instead of one number per message.
+    """
+    if imap.has_capability("ESEARCH"):
+        protocol = imap.protocol
+        # aioimaplib routes untagged responses by name, so register the command under ESEARCH
+        command = aioimaplib.Command(
+            "SEARCH", protocol.new_tag(), "RETURN", "(ALL)", "CHARSET", "utf-8", search_query,
+            untagged_resp_name="ESEARCH", loop=protocol.loop
+        )
+        response = await asyncio.wait_for(protocol.execute(command), imap.timeout)
+        if response.result != "OK":
+            return None
+        for line in response.lines:
+            if isinstance(line, bytes) and line.startswith(b"(TAG"):
+                match = _ESEARCH_ALL_RE.search(line)
+                return _expand_sequence_set(match.group(1)) if match else []
+        return []
+    
+    status, search_data = await imap.search(search_query)
+    if status != "OK":
+        return None
+    if not search_data or not search_data[0]:
+        return []
+    return [int(seq) for seq in search_data[0].split()]
 
 
 async def list_mailbox(user: UserLike, folder: str, page: int, size: int, refresh: bool = False, search_text: Optional[str] = None, is_starred: Optional[bool] = None, read_status: Optional[bool] = None):
@@ -94,43 +294,61 @@ async def list_mailbox(user: UserLike, folder: str, page: int, size: int, refres
     import logging
     logger = logging.getLogger(__name__)
     
+    # Skip the connection entirely for folders the server recently refused to select
+    if is_folder_missing(user, folder):
+        logger.info("Folder '%s' recently not found for user %s, skipping IMAP lookup", folder, user.email)
+        return {"total": 0, "items": []}
+    
     try:
         # Use the fixed connection pool
         async with get_imap_client(user) as imap:
+            select_statuses: list[str] = []
+            
+            async def _examine(name: str) -> tuple[bool, str, list]:
+                status, name, lines = await _safe_examine_folder(imap, name, user.email)
+                select_statuses.append(status)
+                return status == "OK", name, lines
+            
             effective_folder = folder
             # For "inbox", try "INBOX" first (standard IMAP folder name)
             if folder.lower() == "inbox":
                 effective_folder = "INBOX"
                 # Try to examine the folder using our safe method
-                success, effective_folder = await _safe_examine_folder(imap, effective_folder, user.email)
+                success, effective_folder, select_data = await _examine(effective_folder)
             else:
                 # For non-inbox folders, use folder discovery first to avoid failed attempts
                 success = False
+                resolved = None
                 key = _key_from_folder_hint(folder)
                 if key:
                     # Use async resolver with actual folder discovery
-                    resolved = await resolve_special_folder(user, key)
+                    resolved = await resolve_special_folder(user, key, imap)
                     if resolved:
-                        success, effective_folder = await _safe_examine_folder(imap, resolved, user.email)
+                        success, effective_folder, select_data = await _examine(resolved)
                 
                 # If folder discovery didn't work, try the original folder name as fallback
-                if not success:
-                    success, effective_folder = await _safe_examine_folder(imap, folder, user.email)
+                # (unless discovery resolved to that same name, which just failed)
+                if not success and resolved != folder:
+                    success, effective_folder, select_data = await _examine(folder)
             
             if not success:
-                # Last resort: try common variations if this is inbox
+                # Last resort: try common variations if this is inbox ("INBOX" itself was already tried)
                 if folder.lower() == "inbox":
-                    for inbox_variant in ["INBOX", "Inbox", "inbox"]:
-                        success, effective_folder = await _safe_examine_folder(imap, inbox_variant, user.email)
+                    for inbox_variant in ["Inbox", "inbox"]:
+                        success, effective_folder, select_data = await _examine(inbox_variant)
                         if success:
                             break
                 
                 # If still failed, log and return empty
                 if not success:
-                    logger.error(f"CRITICAL: Failed to examine any folder for user {user.email}. Original folder: {folder}. Cannot proceed with UID commands.")
+                    logger.error("CRITICAL: Failed to examine any folder for user %s. Original folder: %s. Cannot proceed with UID commands.", user.email, folder)
+                    # Only an explicit NO means the folder doesn't exist, timeouts and transport
+                    # errors must not hide it, and INBOX always exists
+                    if folder.lower() != "inbox" and select_statuses and all(st == "NO" for st in select_statuses):
+                        mark_folder_missing(user, folder)
                     return {"total": 0, "items": []}
             
-            logger.info(f"Successfully examined folder '{effective_folder}' for user {user.email}. Proceeding with email search.")
+            logger.info("Successfully examined folder '%s' for user %s. Proceeding with email search.", effective_folder, user.email)
             
             if refresh:
                 # NOOP is a standard way to ask the server for any pending updates (e.g., new mail)
@@ -146,146 +364,150 @@ async def list_mailbox(user: UserLike, folder: str, page: int, size: int, refres
             
             # Final safety check: verify IMAP state before UID operations
             if not success:
-                logger.error(f"ABORT: Cannot execute UID commands - no mailbox selected for user {user.email}")
+                logger.error("ABORT: Cannot execute UID commands - no mailbox selected for user %s", user.email)
                 return {"total": 0, "items": []}
             
             # Additional state verification before UID commands
             current_state = getattr(imap, 'state', 'UNKNOWN')
             protocol_state = getattr(imap.protocol, 'state', 'UNKNOWN') if hasattr(imap, 'protocol') else 'UNKNOWN'
-            logger.info(f"Pre-UID state check: client={current_state}, protocol={protocol_state}")
+            logger.info("Pre-UID state check: client=%s, protocol=%s", current_state, protocol_state)
             
             # Diagnostic: Check aioimaplib version and internal state
-            import aioimaplib
-            logger.info(f"aioimaplib version: {getattr(aioimaplib, '__version__', 'unknown')}")
+            logger.info("aioimaplib version: %s", getattr(aioimaplib, '__version__', 'unknown'))
             
             # Search for messages - use regular SEARCH instead of UID SEARCH for better compatibility
-            logger.info(f"Executing SEARCH '{search_query}' in folder '{effective_folder}'")
-            status, search_data = await imap.search(search_query)
-            logger.info(f"SEARCH status: {status}, data: {search_data}")
-            
-            if status != "OK" or not search_data or not search_data[0]:
-                logger.warning(f"SEARCH failed or returned no results")
-                return {"total": 0, "items": []}
-            
-            # Parse sequence numbers from regular SEARCH
-            seq_list = search_data[0].decode().split()
-            total = len(seq_list)
+            # Reuse the previous SEARCH when the mailbox has not changed since (same UIDNEXT/EXISTS/HIGHESTMODSEQ)
+            state = None if refresh else _mailbox_state(select_data)
+            search_key = (*_account_key(user), effective_folder, search_query)
+            cached_search = _SEARCH_CACHE.get(search_key)
+            if state is not None and cached_search is not None and cached_search[0] == state:
+                logger.info("Mailbox '%s' unchanged since last SEARCH, reusing %d results", effective_folder, len(cached_search[1]))
+                _SEARCH_CACHE.move_to_end(search_key)
+                seq_numbers = list(cached_search[1])
+            else:
+                logger.info("Executing SEARCH '%s' in folder '%s'", search_query, effective_folder)
+                seq_numbers = await _search_sequence_numbers(imap, search_query)
+                if state is not None and seq_numbers is not None:
+                    _SEARCH_CACHE[search_key] = (state, list(seq_numbers))
+                    _SEARCH_CACHE.move_to_end(search_key)
+                    while len(_SEARCH_CACHE) > _SEARCH_CACHE_MAX:
+                        _SEARCH_CACHE.popitem(last=False)
             
-            if total == 0:
+            if not seq_numbers:
+                logger.warning("SEARCH failed or returned no results")
                 return {"total": 0, "items": []}
             
-            logger.info(f"Original sequence list: {seq_list[:10]}...")  # Log first 10 for debugging
+            total = len(seq_numbers)
+            logger.debug("Original sequence list: %s...", seq_numbers[:10])  # Log first 10 for debugging
             
-            # Convert to integers and sort in descending order (newest first)
+            # Sort in descending order (newest first)
             # Higher sequence numbers are typically newer emails
-            seq_numbers = [int(seq) for seq in seq_list]
             seq_numbers.sort(reverse=True)
-            seq_list = [str(seq) for seq in seq_numbers]
             
-            logger.info(f"Sorted sequence list: {seq_list[:10]}...")  # Log first 10 for debugging
+            logger.debug("Sorted sequence list: %s...", seq_numbers[:10])  # Log first 10 for debugging
             
             # Apply pagination (convert 1-based page to 0-based index)
             start_idx = (page - 1) * size
             end_idx = start_idx + size
-            page_seqs = seq_list[start_idx:end_idx]
+            page_seqs = seq_numbers[start_idx:end_idx]
             
             if not page_seqs:
                 return {"total": total, "items": []}
             
             # Fetch email data for the page using sequence numbers
-            seq_range = ",".join(page_seqs)
-            logger.info(f"Executing FETCH {seq_range} (UID BODY.PEEK[HEADER] FLAGS INTERNALDATE)")
-            status, msg_data = await imap.fetch(seq_range, "(UID BODY.PEEK[HEADER] FLAGS INTERNALDATE)")
-            logger.info(f"FETCH status: {status}, data length: {len(msg_data) if msg_data else 0}")
+            seq_range = _compress_sequence_set(page_seqs)
+            logger.info("Executing FETCH %s %s", seq_range, _LIST_FETCH_SPEC)
+            status, msg_data = await imap.fetch(seq_range, _LIST_FETCH_SPEC)
+            logger.info("FETCH status: %s, data length: %d", status, len(msg_data) if msg_data else 0)
             
             if status != "OK" or not msg_data:
-                logger.warning(f"FETCH failed or returned no data")
+                logger.warning("FETCH failed or returned no data")
                 return {"total": total, "items": []}
             
-            items = []
-            # Parse FETCH response - handle aioimaplib structure properly
-            logger.info(f"Parsing {len(msg_data)} FETCH response items")
-            
             # Debug: Log the first few items to understand structure
-            for debug_i in range(min(3, len(msg_data))):
-                debug_item = msg_data[debug_i]
-                logger.info(f"FETCH item {debug_i}: type={type(debug_item)}, content={debug_item}")
+            if logger.isEnabledFor(logging.DEBUG):
+                for debug_i, debug_item in enumerate(msg_data[:3]):
+                    if isinstance(debug_item, (bytes, bytearray)):
+                        debug_item = bytes(debug_item[:200])
+                    logger.debug("FETCH item %d: type=%s, content=%.200r", debug_i, type(msg_data[debug_i]).__name__, debug_item)
             
-            i = 0
-            while i < len(msg_data):
-                try:
-                    item = msg_data[i]
-                    
-                    # Look for FETCH response line (bytes containing "FETCH")
-                    if isinstance(item, bytes) and b"FETCH" in item:
-                        response_line = item.decode()
-                        logger.debug(f"Found FETCH response at {i}: {response_line[:100]}...")
-                        
-                        # Extract UID from response line
-                        uid = None
-                        if "UID " in response_line:
-                            try:
-                                uid_part = response_line.split("UID ")[1].split()[0]
-                                uid = int(uid_part)
-                            except (IndexError, ValueError):
-                                logger.debug(f"Failed to extract UID from: {response_line}")
-                                i += 1
-                                continue
-                        
-                        if uid is None:
-                            logger.debug(f"No UID found in response: {response_line}")
-                            i += 1
-                            continue
-                        
-                        # Look for header data in next item
-                        header_bytes = b""
-                        if i + 1 < len(msg_data):
-                            next_item = msg_data[i + 1]
-                            if isinstance(next_item, (bytes, bytearray)):
-                                header_bytes = bytes(next_item)
-                                logger.debug(f"Found header data for UID {uid}, length: {len(header_bytes)}")
-                                i += 1  # Skip the header data item
-                        
-                        # Extract flags from response line
-                        flags_bytes = b""
-                        if "FLAGS " in response_line:
-                            try:
-                                flags_start = response_line.find("FLAGS (")
-                                if flags_start != -1:
-                                    flags_end = response_line.find(")", flags_start)
-                                    if flags_end != -1:
-                                        flags_str = response_line[flags_start:flags_end+1]
-                                        flags_bytes = flags_str.encode()
-                            except Exception:
-                                pass
-                        
-                        # Parse the email data
-                        if header_bytes:
-                            email_data = parse_full_email(header_bytes, flags_bytes)
-                            if email_data:
-                                email_item = format_email_summary(email_data, uid, effective_folder)
-                                items.append(email_item)
-                                logger.debug(f"Successfully parsed email UID {uid}")
-                            else:
-                                logger.debug(f"Failed to parse email data for UID {uid}")
-                        else:
-                            logger.debug(f"No header data found for UID {uid}")
-                    
-                    i += 1
-                
-                except Exception as e:
-                    logger.error(f"Error parsing email data at index {i}: {e}")
-                    i += 1
-                    continue
+            # Parse in a worker thread so other requests' IMAP traffic keeps flowing meanwhile
+            uidvalidity = _extract_uidvalidity(select_data)
+            cache_scope = (*_account_key(user), effective_folder, uidvalidity) if uidvalidity is not None else None
+            items = await asyncio.to_thread(list, _iter_page(msg_data, effective_folder, cache_scope))
             
-            logger.info(f"Successfully parsed {len(items)} emails from {len(msg_data)} response items")
+            logger.info("Successfully parsed %d emails from %d response items", len(items), len(msg_data))
             
             return {"total": total, "items": items}
                 
     except Exception as e:
-        logger.error(f"IMAP operation failed: {e}")
+        logger.error("IMAP operation failed: %s", e)
         return {"total": 0, "items": []}
 
+
+# Parsed email details keyed by (imap_host, imap_port, email, folder, uidvalidity, uid)
+# -> (mailbox state, details, approximate size), least recently used first.
+# Bodies can be up to 1MB each, so the cache is bounded by total size rather than entry count.
+_MESSAGE_CACHE: "OrderedDict[tuple, tuple[Optional[tuple], Dict[str, Any], int]]" = OrderedDict()
+_MESSAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_message_cache_bytes = 0
+
+
+def _extract_uidvalidity(select_lines) -> Optional[int]:
+    """Return the UIDVALIDITY reported in a SELECT response, if any."""
+    for line in select_lines or []:
+        if isinstance(line, (bytes, bytearray)):
+            match = _UIDVALIDITY_RE.search(line)
+            if match:
+                return int(match.group(1))
+    return None
+
+
+def _message_size(result: Dict[str, Any]) -> int:
+    """Rough in-memory footprint of a parsed email, dominated by the body and header strings."""
+    size = 0
+    for value in result.values():
+        if isinstance(value, str):
+            size += len(value)
+        elif isinstance(value, list):
+            size += sum(len(str(item)) for item in value)
+    return size
+
+
+def _get_cached_message(key: Optional[tuple]) -> Optional[tuple[Optional[tuple], Dict[str, Any]]]:
+    if key is None:
+        return None
+    cached = _MESSAGE_CACHE.get(key)
+    if cached is None:
+        return None
+    _MESSAGE_CACHE.move_to_end(key)
+    return cached[0], cached[1]
+
+
+def _evict_message(key: Optional[tuple]) -> None:
+    global _message_cache_bytes
+    if key is None:
+        return
+    cached = _MESSAGE_CACHE.pop(key, None)
+    if cached is not None:
+        _message_cache_bytes -= cached[2]
+
+
+def _cache_message(key: Optional[tuple], result: Dict[str, Any], state: Optional[tuple] = None) -> None:
+    global _message_cache_bytes
+    if key is None:
+        return
+    _evict_message(key)
+    size = _message_size(result)
+    if size > _MESSAGE_CACHE_MAX_BYTES:
+        return
+    _MESSAGE_CACHE[key] = (state, result, size)
+    _message_cache_bytes += size
+    while _message_cache_bytes > _MESSAGE_CACHE_MAX_BYTES:
+        _, (_, _, evicted_size) = _MESSAGE_CACHE.popitem(last=False)
+        _message_cache_bytes -= evicted_size
+
+
 async def get_email_imap(user: UserLike, folder: str, uid: int):
     """Fetch a single email detail from IMAP by UID in the folder.
     Accepts exact provider path or standardized hint; resolves if needed.
@@ -298,51 +520,74 @@ async def get_email_imap(user: UserLike, folder: str, uid: int):
         # For "inbox", try "INBOX" first (standard IMAP folder name)
         if folder.lower() == "inbox":
             effective_folder = "INBOX"
-            status, _ = await imap.select(effective_folder)
+            status, select_data = await imap.select(effective_folder)
         else:
             # For non-inbox folders, use folder discovery first
             status = "NO"
             key = _key_from_folder_hint(folder)
             if key:
                 # Use async resolver with actual folder discovery
-                resolved = await resolve_special_folder(user, key)
+                resolved = await resolve_special_folder(user, key, imap)
                 if resolved:
                     effective_folder = resolved
-                    status, _ = await imap.select(effective_folder)
+                    status, select_data = await imap.select(effective_folder)
             
             # If folder discovery didn't work, try the original folder name as fallback
             if status != "OK":
                 effective_folder = folder
-                status, _ = await imap.select(effective_folder)
+                status, select_data = await imap.select(effective_folder)
         if status != "OK":
-            logger.error(f"Failed to select folder {effective_folder} for email detail")
+            logger.error("Failed to select folder %s for email detail", effective_folder)
             return None
+        
+        # Messages are immutable within a UIDVALIDITY epoch, only the flags need refreshing
+        uidvalidity = _extract_uidvalidity(select_data)
+        cache_key = (*_account_key(user), effective_folder, uidvalidity, uid) if uidvalidity is not None else None
+        state = _mailbox_state(select_data)
+        cached_entry = _get_cached_message(cache_key)
+        if cached_entry is not None:
+            cached_state, cached = cached_entry
+            # With CONDSTORE an unchanged HIGHESTMODSEQ (and EXISTS/UIDNEXT) means no flag changed or expunge happened
+            if state is not None and state == cached_state:
+                logger.info("Serving email detail for UID %s from cache, mailbox unchanged (MODSEQ %s)", uid, state[3])
+                return dict(cached)
+            status, flags_data = await imap.uid("FETCH", str(uid), _FLAGS_FETCH_SPEC)
+            flags_line = next((line for line in flags_data or [] if isinstance(line, bytes) and b"FETCH" in line), None)
+            if status == "OK" and flags_line is not None:
+                logger.info("Serving email detail for UID %s from cache (UIDVALIDITY %s)", uid, uidvalidity)
+                flags = parse_email_flags(flags_line)
+                result = {**cached, "is_read": flags["is_read"], "is_flagged": flags["is_flagged"]}
+                _cache_message(cache_key, result, state)
+                return dict(result)
+            # The message is gone (or FLAGS failed), fall through to a full fetch
+            _evict_message(cache_key)
             
         # Fetch email detail directly
-        logger.info(f"Fetching email detail from folder {effective_folder} for UID {uid}")
+        logger.info("Fetching email detail from folder %s for UID %s", effective_folder, uid)
         # Fetch up to 1MB (1048576 bytes) to prevent giant memory hangs for very large attachments,
         # since we only need headers and body content. Real attachments are fetched individually.
-        status, msg_data = await imap.uid("FETCH", str(uid), "(BODY.PEEK[]<0.1048576> FLAGS)")
-        logger.info(f"UID FETCH status: {status}, data length: {len(msg_data) if msg_data else 0}")
+        status, msg_data = await imap.uid("FETCH", str(uid), _DETAIL_FETCH_SPEC)
+        logger.info("UID FETCH status: %s, data length: %s", status, len(msg_data) if msg_data else 0)
         
         if status != "OK" or not msg_data or (len(msg_data) == 1 and msg_data[0] is None):
-            logger.warning(f"UID FETCH failed for UID {uid} - status: {status}, has_data: {msg_data is not None}")
+            logger.warning("UID FETCH failed for UID %s - status: %s, has_data: %s", uid, status, msg_data is not None)
             return None
 
-        # Debug: Log the structure of msg_data
-        logger.info(f"msg_data type: {type(msg_data)}, length: {len(msg_data) if msg_data else 0}")
-        for i, item in enumerate(msg_data[:5]):  # Log first 5 items
-            if isinstance(item, bytes):
-                logger.info(f"Email detail item {i}: type=bytes, length={len(item)}, content={item[:300]}...")
-            elif isinstance(item, tuple):
-                logger.info(f"Email detail item {i}: type=tuple, length={len(item)}")
-                for j, sub_item in enumerate(item):
-                    if isinstance(sub_item, bytes):
-                        logger.info(f"  sub_item {j}: type=bytes, length={len(sub_item)}, content={sub_item[:200]}...")
-                    else:
-                        logger.info(f"  sub_item {j}: type={type(sub_item)}, content={str(sub_item)[:200]}...")
-            else:
-                logger.info(f"Email detail item {i}: type={type(item)}, content={str(item)[:200]}...")
+        # Debug: Log the structure of msg_data. Only slices are formatted, the body literal can be up to 1MB.
+        logger.info("msg_data type: %s, length: %d", type(msg_data).__name__, len(msg_data) if msg_data else 0)
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, item in enumerate(msg_data[:5]):  # Log first 5 items
+                if isinstance(item, (bytes, bytearray)):
+                    logger.debug("Email detail item %d: type=%s, length=%d, content=%r...", i, type(item).__name__, len(item), bytes(item[:300]))
+                elif isinstance(item, tuple):
+                    logger.debug("Email detail item %d: type=tuple, length=%d", i, len(item))
+                    for j, sub_item in enumerate(item):
+                        if isinstance(sub_item, (bytes, bytearray)):
+                            logger.debug("  sub_item %d: type=%s, length=%d, content=%r...", j, type(sub_item).__name__, len(sub_item), bytes(sub_item[:200]))
+                        else:
+                            logger.debug("  sub_item %d: type=%s, content=%.200s...", j, type(sub_item).__name__, sub_item)
+                else:
+                    logger.debug("Email detail item %d: type=%s, content=%.200s...", i, type(item).__name__, item)
 
         raw_bytes = b""
         flags_blob = b""
@@ -352,46 +597,39 @@ async def get_email_imap(user: UserLike, folder: str, uid: int):
         
         for i, item in enumerate(msg_data):
             if isinstance(item, bytes):
-                item_str = item.decode(errors='ignore')
-                
-                # Check if this is the FETCH response line
-                if "FETCH" in item_str and "BODY[]" in item_str:
-                    logger.info(f"Found FETCH response line: {item_str[:200]}...")
+                # Check if this is the FETCH response line, only that line is decoded
+                if b"FETCH" in item and b"BODY[]" in item:
+                    item_str = item.decode(errors='ignore')
+                    logger.info("Found FETCH response line: %s...", item_str[:200])
                     
                     # Extract flags from the FETCH response line
-                    if "FLAGS" in item_str and not flags_blob:
-                        try:
-                            flags_start = item_str.find("FLAGS (")
-                            if flags_start != -1:
-                                flags_end = item_str.find(")", flags_start)
-                                if flags_end != -1:
-                                    flags_str = item_str[flags_start:flags_end+1]
-                                    flags_blob = flags_str.encode()
-                                    logger.info(f"Extracted flags: {flags_str}")
-                        except Exception:
-                            pass
+                    if not flags_blob:
+                        flags_match = _FETCH_FLAGS_RE.search(item)
+                        if flags_match:
+                            flags_blob = flags_match.group(0)
+                            logger.info("Extracted flags: %r", flags_blob)
                     
                     # Look for the size indicator in BODY[] {size} or BODY[]<0> {size}
-                    import re
-                    size_match = re.search(r'BODY\[\](?:<\d+>)?\s*\{(\d+)\}', item_str)
+                    size_match = _BODY_SIZE_RE.search(item_str)
                     if size_match:
                         expected_size = int(size_match.group(1))
-                        logger.info(f"Expected email size: {expected_size} bytes")
+                        logger.info("Expected email size: %s bytes", expected_size)
                         
                         # The email content should be in the next item(s)
-                        remaining_items = msg_data[i+1:]
-                        email_bytes = b""
+                        email_chunks: list[bytes] = []
+                        email_length = 0
                         
-                        for next_item in remaining_items:
+                        for next_item in msg_data[i+1:]:
                             if isinstance(next_item, (bytes, bytearray)):
-                                email_bytes += bytes(next_item)
-                                if len(email_bytes) >= expected_size:
+                                email_chunks.append(next_item)
+                                email_length += len(next_item)
+                                if email_length >= expected_size:
                                     break
                         
-                        if email_bytes:
+                        if email_chunks:
                             # Trim to expected size if we have extra data
-                            raw_bytes = email_bytes[:expected_size]
-                            logger.info(f"Extracted email content by size: {len(raw_bytes)} bytes")
+                            raw_bytes = b"".join(email_chunks)[:expected_size]
+                            logger.info("Extracted email content by size: %s bytes", len(raw_bytes))
                             break
                     
                     # Fallback: look for email headers in the same item
@@ -411,13 +649,13 @@ async def get_email_imap(user: UserLike, folder: str, uid: int):
                             
                             email_content = item_str[email_start_pos:]
                             raw_bytes = email_content.encode('utf-8')
-                            logger.info(f"Found email content embedded in FETCH response, extracted {len(raw_bytes)} bytes")
+                            logger.info("Found email content embedded in FETCH response, extracted %s bytes", len(raw_bytes))
                             break
                 
                 # Check if this looks like pure email content (starts with email headers)
-                elif any(item_str.strip().startswith(header) for header in ["Return-Path:", "Delivered-To:", "From:", "Subject:", "Date:", "Message-ID:"]):
+                elif item.lstrip().startswith(_EMAIL_HEADER_PREFIXES):
                     raw_bytes = item
-                    logger.info(f"Found pure email content item, length: {len(raw_bytes)}")
+                    logger.info("Found pure email content item, length: %s", len(raw_bytes))
                     break
             
             elif isinstance(item, tuple) and len(item) >= 2:
@@ -425,7 +663,7 @@ async def get_email_imap(user: UserLike, folder: str, uid: int):
                 response_line, email_data = item[0], item[1]
                 
                 if isinstance(response_line, bytes) and b"FETCH" in response_line:
-                    logger.info(f"Found FETCH tuple response")
+                    logger.info("Found FETCH tuple response")
                     
                     # Extract flags from response line
                     if b"FLAGS" in response_line and not flags_blob:
@@ -434,7 +672,7 @@ async def get_email_imap(user: UserLike, folder: str, uid: int):
                     # Email data should be in the second element
                     if isinstance(email_data, (bytes, bytearray)):
                         raw_bytes = bytes(email_data)
-                        logger.info(f"Extracted email data from tuple, length: {len(raw_bytes)}")
+                        logger.info("Extracted email data from tuple, length: %s", len(raw_bytes))
                         break
         
         # If we still don't have email data, try a more aggressive approach
@@ -451,18 +689,15 @@ async def get_email_imap(user: UserLike, folder: str, uid: int):
             
             if combined_data:
                 combined_str = combined_data.decode(errors='ignore')
-                logger.info(f"Combined data length: {len(combined_data)} bytes")
+                logger.info("Combined data length: %s bytes", len(combined_data))
                 
                 # Try to find email content after BODY[] pattern
-                import re
-                
                 # Pattern 1: BODY[] {size}\r\n<email_content>
-                body_pattern = re.compile(r'BODY\[\]\s*\{\d+\}\r?\n(.+)', re.DOTALL)
-                match = body_pattern.search(combined_str)
+                match = _BODY_CONTENT_RE.search(combined_str)
                 if match:
                     email_content = match.group(1)
                     raw_bytes = email_content.encode('utf-8')
-                    logger.info(f"Extracted email using BODY[] pattern, length: {len(raw_bytes)}")
+                    logger.info("Extracted email using BODY[] pattern, length: %s", len(raw_bytes))
                 else:
                     # Pattern 2: Look for first recognizable email header
                     for header in ["Return-Path:", "Delivered-To:", "From:", "Subject:", "Date:", "Message-ID:"]:
@@ -474,7 +709,7 @@ async def get_email_imap(user: UserLike, folder: str, uid: int):
                             
                             email_content = combined_str[email_start:]
                             raw_bytes = email_content.encode('utf-8')
-                            logger.info(f"Extracted email using header '{header}', length: {len(raw_bytes)}")
+                            logger.info("Extracted email using header '%s', length: %s", header, len(raw_bytes))
                             break
                     
                     # Last resort: use all combined data
@@ -482,13 +717,13 @@ async def get_email_imap(user: UserLike, folder: str, uid: int):
                         raw_bytes = combined_data
                         logger.warning("Using all combined data as fallback")
         
-        logger.info(f"Extracted raw_bytes length: {len(raw_bytes)}, flags_blob length: {len(flags_blob)}")
+        logger.info("Extracted raw_bytes length: %s, flags_blob length: %s", len(raw_bytes), len(flags_blob))
         
         if not raw_bytes:
-            logger.warning(f"No email data extracted for UID {uid}")
+            logger.warning("No email data extracted for UID %s", uid)
             return None
         
-        email_data = parse_full_email(raw_bytes, flags_blob)
+        email_data = await asyncio.to_thread(parse_full_email, raw_bytes, flags_blob)
         if email_data:
             # Ensure proper field mapping for API compatibility
             result = {
@@ -506,10 +741,11 @@ async def get_email_imap(user: UserLike, folder: str, uid: int):
                 "has_attachments": email_data.get("has_attachments", False),
                 "attachments": email_data.get("attachments", [])
             }
-            logger.info(f"Successfully parsed email detail for UID {uid}: subject={result.get('subject')}, body_present={result.get('body') is not None}, body_length={len(result.get('body') or '')}")
-            return result
+            logger.info("Successfully parsed email detail for UID %s: subject=%s, body_present=%s, body_length=%s", uid, result.get('subject'), result.get('body') is not None, len(result.get('body') or ''))
+            _cache_message(cache_key, result, state)
+            return dict(result)
         else:
-            logger.warning(f"Failed to parse email data for UID {uid}")
+            logger.warning("Failed to parse email data for UID %s", uid)
             return None
 
 
@@ -527,7 +763,7 @@ async def set_read_flag_imap(user: UserLike, folder: str, uid: int, is_read: boo
             key = _key_from_folder_hint(folder)
             if key:
                 # Use async resolver with actual folder discovery
-                resolved = await resolve_special_folder(user, key)
+                resolved = await resolve_special_folder(user, key, imap)
                 if resolved:
                     effective_folder = resolved
                     status, _ = await imap.select(effective_folder)
@@ -557,7 +793,7 @@ async def set_flagged_status_imap(user: UserLike, folder: str, uid: int, is_flag
             key = _key_from_folder_hint(folder)
             if key:
                 # Use async resolver with actual folder discovery
-                resolved = await resolve_special_folder(user, key)
+                resolved = await resolve_special_folder(user, key, imap)
                 if resolved:
                     effective_folder = resolved
                     status, _ = await imap.select(effective_folder)
@@ -591,7 +827,7 @@ async def move_email_imap(user: UserLike, src_folder: str, uid: int, target_fold
             src_key = _key_from_folder_hint(src_folder)
             if src_key:
                 # Use async resolver with actual folder discovery
-                resolved_src = await resolve_special_folder(user, src_key)
+                resolved_src = await resolve_special_folder(user, src_key, imap)
                 if resolved_src:
                     effective_src = resolved_src
                     status, _ = await imap.select(effective_src)
@@ -609,22 +845,15 @@ async def move_email_imap(user: UserLike, src_folder: str, uid: int, target_fold
         candidates: list[str] = []
         if target_key:
             # Use async resolver with actual folder discovery
-            resolved = await resolve_special_folder(user, target_key)
+            resolved = await resolve_special_folder(user, target_key, imap)
             if resolved:
                 candidates.append(resolved)
-            # Add common synonyms as fallbacks
-            if target_key == "archive":
-                candidates += ["[Gmail]/All Mail", "All Mail", "[Gmail]/Archive", "Archive", "INBOX.Archive", "INBOX.archive"]
-            elif target_key == "trash":
-                candidates += ["[Gmail]/Trash", "Trash", "Bin", "Deleted Items", "Deleted Messages", "INBOX.Trash", "INBOX.trash"]
-            elif target_key == "spam":
-                candidates += ["[Gmail]/Spam", "Spam", "Junk", "Junk Email", "Junk E-mail", "Bulk", "Bulk Mail", "INBOX.Spam", "INBOX.spam"]
-            elif target_key == "sent":
-                candidates += ["[Gmail]/Sent Mail", "Sent", "Sent Items", "INBOX.Sent", "INBOX.sent", "Sent Messages", "Sent Mail"]
-            elif target_key == "drafts":
-                candidates += ["[Gmail]/Drafts", "Drafts", "INBOX.Drafts", "INBOX.drafts"]
             elif target_key == "inbox":
-                candidates += ["INBOX"]
+                candidates.append("INBOX")
+            else:
+                # Only guess common synonyms when the folder LIST gave no answer, since names
+                # missing from it would just cost a failing COPY each
+                candidates += _SPECIAL_CANDIDATES.get(target_key, ())
         # Always also try the provided target literal as-is
         if tf:
             candidates.append(tf)
@@ -683,7 +912,7 @@ async def download_attachment_imap(user: UserLike, folder: str, uid: int, filena
             key = _key_from_folder_hint(folder)
             if key:
                 # Use async resolver with actual folder discovery
-                resolved = await resolve_special_folder(user, key)
+                resolved = await resolve_special_folder(user, key, imap)
                 if resolved:
                     effective_folder = resolved
                     status, _ = await imap.select(effective_folder)
@@ -694,7 +923,7 @@ async def download_attachment_imap(user: UserLike, folder: str, uid: int, filena
                 status, _ = await imap.select(effective_folder)
         if status != "OK":
             return None
-        status, msg_data = await imap.uid("FETCH", str(uid), "(BODY.PEEK[])")
+        status, msg_data = await imap.uid("FETCH", str(uid), _FULL_FETCH_SPEC)
         if status != "OK" or not msg_data:
             return None
         raw_bytes = b""
@@ -713,8 +942,7 @@ async def download_attachment_imap(user: UserLike, folder: str, uid: int, filena
                 if isinstance(part, bytes):
                     part_str = part.decode(errors="ignore")
                     if "FETCH" in part_str and "BODY[]" in part_str:
-                        import re
-                        size_match = re.search(r'BODY\[\](?:<\d+>)?\s*\{(\d+)\}', part_str)
+                        size_match = _BODY_SIZE_RE.search(part_str)
                         if size_match:
                             expected_size = int(size_match.group(1))
                             for next_part in msg_data[i + 1:]:
@@ -758,7 +986,7 @@ async def append_draft_imap(
 
     async with get_imap_client(user) as imap:
         # Use async resolver with actual folder discovery
-        drafts_folder = await resolve_special_folder(user, "drafts") or "Drafts"
+        drafts_folder = await resolve_special_folder(user, "drafts", imap) or "Drafts"
         raw = msg.as_bytes().replace(b"\n", b"\r\n").replace(b"\r\r\n", b"\r\n")
         flags = r"(\\Draft)"
         # aioimaplib append expects datetime/None here, not IMAP internaldate string.
@@ -791,12 +1019,12 @@ def _make_imap(user: UserLike, timeout_seconds: int = None):
     
     # Establish connection
     if settings.IMAP_USE_SSL:
-        imap = imaplib.IMAP4_SSL(user.imap_host, user.imap_port, timeout=timeout)
+        imap = imaplib.IMAP4_SSL(user.imap_host, user.imap_port, ssl_context=get_ssl_context(), timeout=timeout)
     else:
         imap = imaplib.IMAP4(user.imap_host, user.imap_port)
         # Try STARTTLS if available
         try:
-            imap.starttls()
+            imap.starttls(ssl_context=get_ssl_context())
         except Exception:
             pass  # Not all servers support STARTTLS
     
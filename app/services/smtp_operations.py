@@ -2,14 +2,14 @@
 SMTP operations module for email service.
 Handles SMTP-specific operations like sending emails.
 """
-import ssl
+import asyncio
 import smtplib
 import logging
 from datetime import datetime, timezone
 from typing import List, Optional, Tuple, Any
 from ..core.config import get_settings
 from ..core.security import decrypt_secret
-from ..core.connection_pool import get_smtp_client, get_imap_client
+from ..core.connection_pool import get_smtp_client, get_imap_client, get_ssl_context
 from .folder_manager import resolve_special_folder
 from .email_parser import create_email_message
 from .imap_operations import move_email_imap
@@ -27,6 +27,36 @@ class UserLike(Protocol):
     imap_port: int
 
 
+# Strong references to in-flight Sent copies, so a failed send doesn't leave them to the GC
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
+
+
+async def _append_sent_copy(user: UserLike, msg, smtp_sent: asyncio.Future) -> None:
+    """Save a copy of msg to the IMAP Sent folder once smtp_sent resolves to True.
+    Some SMTP providers do this automatically, many do not.
+    """
+    try:
+        async with get_imap_client(user) as imap:
+            sent_folder = await resolve_special_folder(user, "sent", imap) or "Sent"
+            raw = msg.as_bytes().replace(b"\n", b"\r\n").replace(b"\r\r\n", b"\r\n")
+            if not await smtp_sent:
+                return
+            flags = r"(\\Seen)"
+            sent_at = datetime.now(timezone.utc)
+            try:
+                status, _ = await imap.append(raw, sent_folder, flags, sent_at)
+            except (TypeError, ValueError):
+                status, _ = await imap.append(raw, sent_folder, flags, None)
+            if status != "OK":
+                status, _ = await imap.append(raw, sent_folder, None, None)
+            if status != "OK":
+                logger.warning("SMTP send succeeded but failed to append copy to Sent for %s", user.email)
+    except Exception as e:
+        # Only worth a warning if the message actually went out
+        if await smtp_sent:
+            logger.warning("SMTP send succeeded but Sent sync failed for %s: %s", user.email, e)
+
+
 async def send_email(
     user: UserLike,
     subject: Optional[str],
@@ -49,32 +79,27 @@ async def send_email(
         attachments=attachments
     )
 
-    # Send via SMTP using connection pool
-    async with get_smtp_client(user) as smtp:
-        await smtp.send_message(msg)
+    # Connect to IMAP and resolve the Sent folder while SMTP is still sending, the append
+    # itself waits until the send has succeeded
+    smtp_sent: asyncio.Future = asyncio.get_running_loop().create_future()
+    sent_copy = asyncio.create_task(_append_sent_copy(user, msg, smtp_sent))
+    _BACKGROUND_TASKS.add(sent_copy)
+    sent_copy.add_done_callback(_BACKGROUND_TASKS.discard)
 
-    # Save a copy to IMAP Sent so mailbox stays in sync.
-    # Some SMTP providers do this automatically, many do not.
+    # Send via SMTP using connection pool
     try:
-        async with get_imap_client(user) as imap:
-            sent_folder = await resolve_special_folder(user, "sent") or "Sent"
-            raw = msg.as_bytes().replace(b"\n", b"\r\n").replace(b"\r\r\n", b"\r\n")
-            flags = r"(\\Seen)"
-            sent_at = datetime.now(timezone.utc)
-            try:
-                status, _ = await imap.append(raw, sent_folder, flags, sent_at)
-            except (TypeError, ValueError):
-                status, _ = await imap.append(raw, sent_folder, flags, None)
-            if status != "OK":
-                status, _ = await imap.append(raw, sent_folder, None, None)
-            if status != "OK":
-                logger.warning("SMTP send succeeded but failed to append copy to Sent for %s", user.email)
-    except Exception as e:
-        logger.warning("SMTP send succeeded but Sent sync failed for %s: %s", user.email, e)
-        
+        async with get_smtp_client(user) as smtp:
+            await smtp.send_message(msg)
+    except BaseException:
+        smtp_sent.set_result(False)
+        raise
+    smtp_sent.set_result(True)
+
     # If successful, delete draft if provided
     if draft_id:
-        await move_email_imap(user, "drafts", draft_id, "trash")
+        await asyncio.gather(sent_copy, move_email_imap(user, "drafts", draft_id, "trash"))
+    else:
+        await sent_copy
     
     return {"status": "sent", "message_id": msg.get("Message-ID")}
 
@@ -82,7 +107,7 @@ async def send_email(
 def _make_smtp(user: UserLike):
     """Create SMTP connection (legacy function for compatibility)."""
     settings = get_settings()
-    context = ssl.create_default_context()
+    context = get_ssl_context()
     
     # Handle both encrypted (database mode) and plain text (stateless mode) passwords
     if hasattr(user, 'encrypted_password') and user.encrypted_password:
@@ -0,0 +1,11 @@
+from app.services.email_parser import parse_summary_headers
+
+
+def test_encoded_display_name_with_at_is_not_split():
+    raw = b"From: =?utf-8?q?ceo@bank.com?= <attacker@evil.com>\r\n\r\n"
+    assert parse_summary_headers(raw)["from"] == '"ceo@bank.com" <attacker@evil.com>'
+
+
+def test_encoded_display_name_with_comma_is_not_split():
+    raw = b"To: =?utf-8?q?M=C3=BCller=2C_Hans?= <h@x.de>, b@c.d\r\n\r\n"
+    assert parse_summary_headers(raw)["to"] == ['"Müller, Hans" <h@x.de>', "b@c.d"]